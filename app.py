@@ -4,15 +4,30 @@
 import os
 from dotenv import load_dotenv
 import sqlite3
-import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from dataclasses import dataclass, replace
 from flask import Flask, render_template, request, jsonify
-import openai
-from serpapi import GoogleSearch
+from flask.json.provider import JSONProvider
+from openai import OpenAI
+from openai.types import Batch
+import orjson
 import re
+import hashlib
+import threading
+import time
+import queue
+from contextlib import contextmanager
+from collections import OrderedDict
+from itertools import groupby
+from statistics import mode
+from operator import attrgetter, itemgetter
+import diskcache
+from rapidfuzz import fuzz, process
 
 # Configuration
 
@@ -23,8 +38,15 @@ class Config:
     SERPAPI_KEY = os.getenv('SERPAPI_KEY')
     WEATHER_API_KEY = os.getenv('WEATHER_API_KEY')
     DATABASE_PATH = 'plans.db'
+    CACHE_DIR = 'cache'
+    OPENAI_MODEL = 'gpt-4o-mini'
+    SEARCH_CACHE_TTL = 24 * 60 * 60  # seconds
+    WEATHER_CACHE_TTL = 15 * 60  # seconds
+    RECENT_PLAN_TTL = 60 * 60  # seconds
+    PLAN_TIMEOUT = 10 * 60  # seconds a plan may stay "pending" before it is given up on
+    PLANS_PER_PAGE = 20
 
-@dataclass
+@dataclass(slots=True)
 class PlanStep:
     step_number: int
     title: str
@@ -33,7 +55,7 @@ class PlanStep:
     day: int
     external_info: Optional[Dict] = None
 
-@dataclass
+@dataclass(slots=True)
 class Plan:
     id: Optional[int]
     goal: str
@@ -42,46 +64,157 @@ class Plan:
     created_at: str
     total_duration: str
     days_count: int
+    status: str = "ready"  # "pending" while generation or enrichment is still running, "failed" on error
+
+@dataclass(slots=True)
+class PlanSummary:
+    """Lightweight view of a plan for list pages"""
+    id: int
+    goal: str
+    created_at: str
+    total_duration: str
+    step_count: int
+
+def create_http_session(pool_maxsize: int = 20) -> requests.Session:
+    """Create a requests session with keep-alive connection pooling and retries"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class ResponseCache:
+    """Two-level cache for external API responses: in-memory LRU in front of a disk cache
+    
+    Values are stored as serialized JSON, so every hit hands back a fresh copy
+    that callers are free to mutate.
+    """
+    
+    def __init__(self, directory: str, memory_size: int = 1024):
+        self.disk = diskcache.Cache(directory)
+        self.memory_size = memory_size
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a content-addressed key from the inputs of a call"""
+        return hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+    
+    def __contains__(self, key: str) -> bool:
+        """Check for an unexpired entry without reading or decoding its value"""
+        # Every value is written to disk, so the disk cache alone is authoritative
+        return key in self.disk
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, data = entry
+                if expires_at is None or expires_at > time.time():
+                    self._memory.move_to_end(key)
+                    return orjson.loads(data)
+                del self._memory[key]
+        
+        data, expires_at = self.disk.get(key, expire_time=True)
+        if data is None:
+            return None
+        self._remember(key, data, expires_at)
+        return orjson.loads(data)
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store value under key, expiring after ttl seconds if given"""
+        data = orjson.dumps(value)
+        self.disk.set(key, data, expire=ttl)
+        self._remember(key, data, time.time() + ttl if ttl else None)
+    
+    def _remember(self, key: str, data: bytes, expires_at: Optional[float]):
+        with self._lock:
+            self._memory[key] = (expires_at, data)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
 
 class WebSearchTool:
     """Tool for web search using SerpAPI"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, timeout: float = 15,
+                 cache: Optional[ResponseCache] = None, cache_ttl: Optional[float] = None):
         self.api_key = api_key
+        self.base_url = "https://serpapi.com/search.json"
+        self.timeout = timeout
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        # Called directly rather than through serpapi.GoogleSearch, which
+        # opens a new connection for every query
+        self.session = create_http_session()
     
     def search(self, query: str, num_results: int = 5) -> List[Dict]:
         """Search the web for information"""
+        cache_key = ResponseCache.make_key("search", query, num_results)
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            search = GoogleSearch({
+            response = self.session.get(self.base_url, params={
+                "engine": "google",
                 "q": query,
                 "api_key": self.api_key,
                 "num": num_results
-            })
-            results = search.get_dict()
+            }, timeout=self.timeout)
+            response.raise_for_status()
+            results = orjson.loads(response.content)
             
-            if "organic_results" in results:
-                return [
-                    {
-                        "title": result.get("title", ""),
-                        "snippet": result.get("snippet", ""),
-                        "link": result.get("link", "")
-                    }
-                    for result in results["organic_results"]
-                ]
-            return []
+            search_results = [
+                {
+                    "title": result.get("title", ""),
+                    "snippet": result.get("snippet", ""),
+                    "link": result.get("link", "")
+                }
+                for result in results.get("organic_results", [])
+            ]
+            if self.cache:
+                self.cache.set(cache_key, search_results, ttl=self.cache_ttl)
+            return search_results
         except Exception as e:
             print(f"Web search error: {e}")
             return []
+    
+    def search_many(self, queries: List[str], num_results: int = 5, max_concurrency: int = 10) -> List[List[Dict]]:
+        """Run several searches concurrently over the shared session, returning results in query order"""
+        if not queries:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(len(queries), max_concurrency)) as executor:
+            return list(executor.map(lambda query: self.search(query, num_results), queries))
 
 class WeatherTool:
     """Tool for weather information using OpenWeatherMap API"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, timeout: float = 5,
+                 cache: Optional[ResponseCache] = None, cache_ttl: Optional[float] = None):
         self.api_key = api_key
-        self.base_url = "http://api.openweathermap.org/data/2.5"
+        self.base_url = "https://api.openweathermap.org/data/2.5"
+        self.timeout = timeout
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.session = create_http_session()
     
     def get_weather(self, city: str, days: int = 3) -> Dict:
         """Get weather forecast for a city"""
+        cache_key = ResponseCache.make_key("weather", city, days)
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
             # Current weather
             current_url = f"{self.base_url}/weather"
@@ -90,8 +223,6 @@ class WeatherTool:
                 "appid": self.api_key,
                 "units": "metric"
             }
-            current_response = requests.get(current_url, params=current_params)
-            current_data = current_response.json()
             
             # Forecast
             forecast_url = f"{self.base_url}/forecast"
@@ -99,12 +230,24 @@ class WeatherTool:
                 "q": city,
                 "appid": self.api_key,
                 "units": "metric",
-                "cnt": days * 8  # 8 forecasts per day (every 3 hours)
+                # 8 forecasts per day (every 3 hours). cnt takes the next N consecutive
+                # timestamps rather than sampling across the range, so asking for
+                # fewer would cut the forecast short instead of thinning it out
+                "cnt": days * 8
             }
-            forecast_response = requests.get(forecast_url, params=forecast_params)
-            forecast_data = forecast_response.json()
             
-            return {
+            # The two requests are independent, so fetch them in parallel
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                current_future = executor.submit(
+                    self.session.get, current_url, params=current_params, timeout=self.timeout
+                )
+                forecast_future = executor.submit(
+                    self.session.get, forecast_url, params=forecast_params, timeout=self.timeout
+                )
+                current_data = current_future.result().json()
+                forecast_data = forecast_future.result().json()
+            
+            weather = {
                 "current": {
                     "temperature": current_data["main"]["temp"],
                     "description": current_data["weather"][0]["description"],
@@ -112,6 +255,9 @@ class WeatherTool:
                 },
                 "forecast": self._process_forecast(forecast_data, days)
             }
+            if self.cache:
+                self.cache.set(cache_key, weather, ttl=self.cache_ttl)
+            return weather
         except Exception as e:
             print(f"Weather API error: {e}")
             return {"error": str(e)}
@@ -121,180 +267,874 @@ class WeatherTool:
         if "list" not in forecast_data:
             return []
         
-        daily_forecasts = []
-        current_date = None
-        daily_temps = []
-        daily_conditions = []
-        
-        for item in forecast_data["list"][:days * 8]:
-            date = datetime.fromtimestamp(item["dt"]).date()
-            
-            if current_date != date:
-                if current_date is not None and daily_temps:
-                    daily_forecasts.append({
-                        "date": current_date.strftime("%Y-%m-%d"),
-                        "min_temp": min(daily_temps),
-                        "max_temp": max(daily_temps),
-                        "description": max(set(daily_conditions), key=daily_conditions.count)
-                    })
-                
-                current_date = date
-                daily_temps = []
-                daily_conditions = []
-            
-            daily_temps.append(item["main"]["temp"])
-            daily_conditions.append(item["weather"][0]["description"])
+        # Pull out (date, temperature, condition) once per item, then reduce each
+        # run of same-day items into a daily summary
+        items = [
+            (datetime.fromtimestamp(item["dt"]).date(), item["main"]["temp"], item["weather"][0]["description"])
+            for item in forecast_data["list"][:days * 8]
+        ]
         
-        # Add the last day
-        if daily_temps:
+        daily_forecasts = []
+        for date, day_items in groupby(items, key=itemgetter(0)):
+            _, temps, conditions = zip(*day_items)
             daily_forecasts.append({
-                "date": current_date.strftime("%Y-%m-%d"),
-                "min_temp": min(daily_temps),
-                "max_temp": max(daily_temps),
-                "description": max(set(daily_conditions), key=daily_conditions.count)
+                "date": date.strftime("%Y-%m-%d"),
+                "min_temp": min(temps),
+                "max_temp": max(temps),
+                "description": mode(conditions)  # first-seen condition wins ties
             })
         
         return daily_forecasts
 
+class OpenAIBatchTool:
+    """Tool for submitting chat completions through the OpenAI Batch API"""
+    
+    def __init__(self, client: OpenAI):
+        self.client = client
+    
+    def submit(self, batch_requests: List[Dict]) -> str:
+        """Upload chat completion requests as a JSONL file and start a batch job
+        
+        Each request needs a unique "custom_id" and the "body" of a
+        /v1/chat/completions call. Returns the batch id.
+        """
+        lines = [
+            orjson.dumps({
+                "custom_id": batch_request["custom_id"],
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": batch_request["body"]
+            })
+            for batch_request in batch_requests
+        ]
+        
+        upload = self.client.files.create(file=("plans.jsonl", b"\n".join(lines)), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+    
+    def wait(self, batch_id: str, poll_interval: float = 30) -> Batch:
+        """Poll a batch job until it reaches a final state"""
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                return batch
+            time.sleep(poll_interval)
+    
+    def get_results(self, batch: Batch) -> Dict[str, str]:
+        """Map each custom_id of a finished batch to its message content"""
+        if not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch.id} finished with status {batch.status}")
+        
+        output = self.client.files.content(batch.output_file_id)
+        
+        contents = {}
+        for line in output.content.splitlines():
+            if not line:
+                continue
+            result = orjson.loads(line)
+            if result.get("error") or result["response"]["status_code"] != 200:
+                continue
+            contents[result["custom_id"]] = result["response"]["body"]["choices"][0]["message"]["content"]
+        return contents
+
 class DatabaseManager:
-    """Database manager for storing and retrieving plans"""
+    """Database manager for storing and retrieving plans
+    
+    Keeps a small pool of long-lived connections: one writer, which serialises
+    all writes, and several readers that WAL mode lets run alongside it.
     
-    def __init__(self, db_path: str):
+    Decoded plans are cached in memory once they are "ready", because a ready
+    plan is never written again. Pending and failed plans are always read from
+    the database, since another worker process may be the one finishing them.
+    Cached Plan objects are shared between callers and must not be mutated.
+    """
+    
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA cache_size=-20000",  # ~20 MB page cache
+        "PRAGMA temp_store=MEMORY"
+    )
+    # Under gevent many greenlets in one worker may read at once; reads hold a
+    # connection only for the duration of their queries
+    READ_CONNECTIONS = 16
+    READ_TIMEOUT = 10  # seconds to wait for a free read connection
+    
+    def __init__(self, db_path: str, read_connections: Optional[int] = None, cache_size: int = 512):
         self.db_path = db_path
+        self.cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self._plan_cache: OrderedDict = OrderedDict()  # plan_id -> ready Plan
+        self._writer = self._connect()
+        self._write_lock = threading.Lock()
+        self._readers: queue.Queue = queue.Queue()
+        for _ in range(read_connections or self.READ_CONNECTIONS):
+            self._readers.put(self._connect())
         self._initialize_database()
+        self._backfill_display_json()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a tuned connection
+        
+        Connections are kept open, which also keeps sqlite3's per-connection cache
+        of prepared statements warm, so repeated queries skip SQL compilation.
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,  # pooled connections move between threads
+            isolation_level=None  # transactions are managed explicitly
+        )
+        # Rows can be read by column name; sqlite3.Row is implemented in C and
+        # still unpacks like a tuple
+        conn.row_factory = sqlite3.Row
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @contextmanager
+    def _reading(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read connection from the pool"""
+        try:
+            conn = self._readers.get(timeout=self.READ_TIMEOUT)
+        except queue.Empty:
+            raise sqlite3.OperationalError("timed out waiting for a database connection") from None
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            self._readers.put(conn)
+    
+    @contextmanager
+    def _writing(self) -> Iterator[sqlite3.Connection]:
+        """Use the write connection inside a BEGIN IMMEDIATE transaction"""
+        with self._write_lock:
+            self._writer.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._writer
+                self._writer.execute('COMMIT')
+            except BaseException:
+                # Also covers a failed COMMIT (e.g. SQLITE_BUSY), which leaves the
+                # transaction open and would make every later BEGIN fail
+                if self._writer.in_transaction:
+                    self._writer.execute('ROLLBACK')
+                raise
+    
+    CREATE_PLANS_SQL = '''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            goal TEXT NOT NULL,
+            weather_info TEXT,
+            created_at TEXT NOT NULL,
+            total_duration TEXT,
+            days_count INTEGER DEFAULT 1,
+            status TEXT NOT NULL DEFAULT 'ready',
+            display_json TEXT
+        )
+    '''
     
     def _initialize_database(self):
         """Initialize the database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._writing() as conn:
+            conn.execute(self.CREATE_PLANS_SQL.format(table='plans'))
+            # One row per step, clustered by plan so a plan's steps are stored
+            # together; position keeps the order the steps were generated in
             conn.execute('''
-                CREATE TABLE IF NOT EXISTS plans (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    goal TEXT NOT NULL,
-                    steps TEXT NOT NULL,
-                    weather_info TEXT,
-                    created_at TEXT NOT NULL,
-                    total_duration TEXT,
-                    days_count INTEGER DEFAULT 1
-                )
+                CREATE TABLE IF NOT EXISTS plan_steps (
+                    plan_id INTEGER NOT NULL REFERENCES plans(id),
+                    position INTEGER NOT NULL,
+                    step_number INTEGER NOT NULL,
+                    title TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    estimated_time TEXT,
+                    day INTEGER NOT NULL DEFAULT 1,
+                    external_info TEXT,
+                    PRIMARY KEY (plan_id, position)
+                ) WITHOUT ROWID
             ''')
-            conn.commit()
+            
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(plans)').fetchall()}
+            # Databases created before the status column existed
+            if 'status' not in columns:
+                conn.execute("ALTER TABLE plans ADD COLUMN status TEXT NOT NULL DEFAULT 'ready'")
+            # ... and before display_json; filled in by _backfill_display_json
+            if 'display_json' not in columns:
+                conn.execute('ALTER TABLE plans ADD COLUMN display_json TEXT')
+            # Databases that stored each plan's steps as a JSON array in plans.steps
+            if 'steps' in columns:
+                conn.execute('''
+                    INSERT INTO plan_steps
+                    SELECT plans.id, step.key, json_extract(step.value, '$.step_number'),
+                           json_extract(step.value, '$.title'), json_extract(step.value, '$.description'),
+                           json_extract(step.value, '$.estimated_time'), COALESCE(json_extract(step.value, '$.day'), 1),
+                           json_extract(step.value, '$.external_info')
+                    FROM plans, json_each(plans.steps) AS step
+                ''')
+                # Rebuild the table without the column rather than using
+                # ALTER TABLE ... DROP COLUMN, which needs SQLite 3.35+
+                conn.execute(self.CREATE_PLANS_SQL.format(table='plans_migrated'))
+                conn.execute(f'''
+                    INSERT INTO plans_migrated ({self.PLAN_COLUMNS})
+                    SELECT {self.PLAN_COLUMNS} FROM plans
+                ''')
+                # Carry the AUTOINCREMENT counter over so IDs are never reused
+                conn.execute("DELETE FROM sqlite_sequence WHERE name = 'plans_migrated'")
+                conn.execute('''
+                    INSERT INTO sqlite_sequence (name, seq)
+                    SELECT 'plans_migrated', seq FROM sqlite_sequence WHERE name = 'plans'
+                ''')
+                conn.execute('DROP TABLE plans')
+                conn.execute('ALTER TABLE plans_migrated RENAME TO plans')
+            
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_plans_created ON plans(created_at DESC)')
+    
+    # The queries shared by several methods, kept in one place. sqlite3 caches
+    # compiled statements per connection by their SQL text, so each is compiled
+    # once per connection either way
+    PLAN_COLUMNS = 'id, goal, weather_info, created_at, total_duration, days_count, status'
+    STEP_COLUMNS = 'step_number, title, description, estimated_time, day, external_info'
+    # display_json holds the plan exactly as /api/plan/<id> returns it; status and
+    # weather changes patch it in place with json_set
+    INSERT_PLAN_SQL = '''
+        INSERT INTO plans (goal, weather_info, created_at, total_duration, days_count, status)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+    INSERT_STEP_SQL = f'''
+        INSERT INTO plan_steps (plan_id, position, {STEP_COLUMNS})
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    UPDATE_PLAN_SQL = '''
+        UPDATE plans SET weather_info = ?, total_duration = ?, days_count = ?, status = ?, display_json = ?
+        WHERE id = ?
+    '''
+    UPDATE_DISPLAY_SQL = 'UPDATE plans SET display_json = ? WHERE id = ?'
+    DELETE_STEPS_SQL = 'DELETE FROM plan_steps WHERE plan_id = ?'
+    UPDATE_STATUS_SQL = '''
+        UPDATE plans SET status = ?1, display_json = json_set(display_json, '$.status', ?1)
+        WHERE id = ?2
+    '''
+    UPDATE_WEATHER_SQL = '''
+        UPDATE plans SET weather_info = ?1, status = 'ready',
+                         display_json = json_set(display_json, '$.weather_info', json(?1), '$.status', 'ready')
+        WHERE id = ?2
+    '''
+    SELECT_DISPLAY_SQL = 'SELECT display_json FROM plans WHERE id = ?'
+    SELECT_PLAN_SQL = f'SELECT {PLAN_COLUMNS} FROM plans WHERE id = ?'
+    SELECT_STEPS_SQL = f'SELECT {STEP_COLUMNS} FROM plan_steps WHERE plan_id = ? ORDER BY position'
     
     def save_plan(self, plan: Plan) -> int:
         """Save a plan to the database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO plans (goal, steps, weather_info, created_at, total_duration, days_count)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                plan.goal,
-                json.dumps([asdict(step) for step in plan.steps]),
-                json.dumps(plan.weather_info) if plan.weather_info else None,
-                plan.created_at,
+        with self._writing() as conn:
+            plan_id = conn.execute(self.INSERT_PLAN_SQL, self._plan_to_row(plan)).lastrowid
+            conn.executemany(self.INSERT_STEP_SQL, self._step_rows(plan_id, plan.steps))
+            # The ID is part of the JSON, so it can only be encoded after the insert
+            conn.execute(self.UPDATE_DISPLAY_SQL, (self._display_json(plan, plan_id), plan_id))
+        return plan_id
+    
+    def save_plans_many(self, plans: List[Plan]) -> List[int]:
+        """Save several plans in a single transaction and return their IDs in order"""
+        if not plans:
+            return []
+        
+        rows = [self._plan_to_row(plan) for plan in plans]
+        # BEGIN IMMEDIATE takes the write lock up front, so the AUTOINCREMENT
+        # IDs handed out below are consecutive
+        with self._writing() as conn:
+            conn.executemany(self.INSERT_PLAN_SQL, rows)
+            last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+            plan_ids = list(range(last_id - len(rows) + 1, last_id + 1))
+            conn.executemany(self.INSERT_STEP_SQL, [
+                step_row
+                for plan_id, plan in zip(plan_ids, plans)
+                for step_row in self._step_rows(plan_id, plan.steps)
+            ])
+            conn.executemany(self.UPDATE_DISPLAY_SQL, [
+                (self._display_json(plan, plan_id), plan_id)
+                for plan_id, plan in zip(plan_ids, plans)
+            ])
+        
+        return plan_ids
+    
+    def _plan_to_row(self, plan: Plan) -> tuple:
+        """Convert Plan object to the parameters of INSERT_PLAN_SQL"""
+        return (
+            plan.goal,
+            orjson.dumps(plan.weather_info).decode() if plan.weather_info else None,
+            plan.created_at,
+            plan.total_duration,
+            plan.days_count,
+            plan.status
+        )
+    
+    @staticmethod
+    def _display_json(plan: Plan, plan_id: int) -> str:
+        """Encode the API representation of a plan saved under plan_id"""
+        return plan_to_api_json(replace(plan, id=plan_id)).decode()
+    
+    @staticmethod
+    def _step_rows(plan_id: int, steps: List[PlanStep]) -> List[tuple]:
+        """Convert a plan's steps to the parameters of INSERT_STEP_SQL"""
+        return [
+            (
+                plan_id,
+                position,
+                step.step_number,
+                step.title,
+                step.description,
+                step.estimated_time,
+                step.day,
+                orjson.dumps(step.external_info).decode() if step.external_info else None
+            )
+            for position, step in enumerate(steps)
+        ]
+    
+    def update_plan(self, plan: Plan):
+        """Replace the generated content of a saved plan, keeping its creation time"""
+        with self._writing() as conn:
+            conn.execute(self.UPDATE_PLAN_SQL, (
+                orjson.dumps(plan.weather_info).decode() if plan.weather_info else None,
                 plan.total_duration,
-                plan.days_count
+                plan.days_count,
+                plan.status,
+                self._display_json(plan, plan.id),
+                plan.id
             ))
-            conn.commit()
-            return cursor.lastrowid
+            conn.execute(self.DELETE_STEPS_SQL, (plan.id,))
+            conn.executemany(self.INSERT_STEP_SQL, self._step_rows(plan.id, plan.steps))
+    
+    def update_plan_status(self, plan_id: int, status: str):
+        """Set the status of a saved plan"""
+        with self._writing() as conn:
+            conn.execute(self.UPDATE_STATUS_SQL, (status, plan_id))
+    
+    def expire_pending_plans(self, started_before: str):
+        """Settle plans still "pending" that were started before the given time
+        
+        Plans that already have their steps were only waiting for the weather and
+        become "ready"; stubs that never got a plan become "failed".
+        """
+        with self._writing() as conn:
+            for status, has_steps in (("ready", "EXISTS"), ("failed", "NOT EXISTS")):
+                conn.execute(f'''
+                    UPDATE plans SET status = ?1, display_json = json_set(display_json, '$.status', ?1)
+                    WHERE status = 'pending' AND created_at < ?2
+                      AND {has_steps} (SELECT 1 FROM plan_steps WHERE plan_id = plans.id)
+                ''', (status, started_before))
+    
+    def update_plan_weather(self, plan_id: int, weather_info: Optional[Dict]):
+        """Store weather information fetched after the plan was saved and mark it ready"""
+        with self._writing() as conn:
+            conn.execute(
+                self.UPDATE_WEATHER_SQL,
+                (orjson.dumps(weather_info).decode() if weather_info else None, plan_id)
+            )
+    
+    # Read queries fetch all their rows before the connection goes back to the
+    # pool, so no unfinished statement is left holding an old WAL snapshot
     
     def get_plan(self, plan_id: int) -> Optional[Plan]:
         """Retrieve a specific plan by ID"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM plans WHERE id = ?', (plan_id,))
-            row = cursor.fetchone()
-            
-            if row:
-                return self._row_to_plan(row)
+        with self._cache_lock:
+            plan = self._plan_cache.get(plan_id)
+            if plan is not None:
+                self._plan_cache.move_to_end(plan_id)
+                return plan
+        
+        with self._reading() as conn:
+            # Both reads in one transaction, so the steps match the plan row
+            conn.execute('BEGIN')
+            rows = conn.execute(self.SELECT_PLAN_SQL, (plan_id,)).fetchall()
+            step_rows = conn.execute(self.SELECT_STEPS_SQL, (plan_id,)).fetchall() if rows else []
+            conn.execute('COMMIT')
+        
+        if not rows:
             return None
+        
+        plan = self._row_to_plan(rows[0], step_rows)
+        if plan.status == "ready":
+            with self._cache_lock:
+                self._plan_cache[plan_id] = plan
+                self._plan_cache.move_to_end(plan_id)
+                while len(self._plan_cache) > self.cache_size:
+                    self._plan_cache.popitem(last=False)
+        return plan
     
-    def get_all_plans(self) -> List[Plan]:
-        """Retrieve all plans"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM plans ORDER BY created_at DESC')
-            rows = cursor.fetchall()
-            
-            return [self._row_to_plan(row) for row in rows]
+    def get_plan_json(self, plan_id: int) -> Optional[bytes]:
+        """Retrieve a plan's stored API JSON by ID"""
+        with self._reading() as conn:
+            rows = conn.execute(self.SELECT_DISPLAY_SQL, (plan_id,)).fetchall()
+        
+        if rows and rows[0]["display_json"] is not None:
+            return rows[0]["display_json"].encode()
+        return None
+    
+    def _backfill_display_json(self):
+        """Encode display_json for plans saved before the column existed"""
+        with self._reading() as conn:
+            plan_ids = [row["id"] for row in conn.execute('SELECT id FROM plans WHERE display_json IS NULL').fetchall()]
+        
+        for plan_id in plan_ids:
+            plan = self.get_plan(plan_id)
+            with self._writing() as conn:
+                conn.execute(self.UPDATE_DISPLAY_SQL, (self._display_json(plan, plan_id), plan_id))
     
-    def _row_to_plan(self, row) -> Plan:
-        """Convert database row to Plan object"""
-        id, goal, steps_json, weather_info_json, created_at, total_duration, days_count = row
+    def iter_plans_raw(self) -> Iterator[tuple]:
+        """Yield all plans as rows, with steps and weather_info as JSON text
         
-        steps_data = json.loads(steps_json)
-        steps = [PlanStep(**step_data) for step_data in steps_data]
+        The steps JSON array is assembled by SQLite, so no PlanStep objects are
+        built. Rows are read from the cursor one at a time rather than fetched up
+        front. A streamed response can be consumed as slowly as its client reads,
+        so it uses a connection of its own, closed with the iterator, rather than
+        holding one of the pooled readers.
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute('''
+                SELECT id, goal,
+                       (SELECT json_group_array(json_object(
+                            'step_number', step_number, 'title', title, 'description', description,
+                            'estimated_time', estimated_time, 'day', day, 'external_info', json(external_info)
+                        ))
+                        FROM (SELECT * FROM plan_steps WHERE plan_id = plans.id ORDER BY position)),
+                       weather_info, created_at, total_duration, COALESCE(days_count, 1), status
+                FROM plans ORDER BY created_at DESC
+            ''')
+            yield from cursor
+        finally:
+            conn.close()
+    
+    def get_plan_summaries(self, limit: int = 20, offset: int = 0) -> List[PlanSummary]:
+        """Retrieve a page of plan summaries, newest first
         
-        weather_info = json.loads(weather_info_json) if weather_info_json else None
+        Only the columns the list view needs are read and no JSON is decoded;
+        the step count is counted from the plan's rows in plan_steps.
+        """
+        with self._reading() as conn:
+            rows = conn.execute('''
+                SELECT id, goal, created_at, total_duration,
+                       (SELECT COUNT(*) FROM plan_steps WHERE plan_id = plans.id)
+                FROM plans ORDER BY created_at DESC LIMIT ? OFFSET ?
+            ''', (limit, offset)).fetchall()
+        
+        return [PlanSummary(*row) for row in rows]
+    
+    def _row_to_plan(self, row: sqlite3.Row, step_rows: List[sqlite3.Row]) -> Plan:
+        """Convert a database row and its plan_steps rows to a Plan object"""
+        steps = [
+            PlanStep(
+                step_number=step_row["step_number"],
+                title=step_row["title"],
+                description=step_row["description"],
+                estimated_time=step_row["estimated_time"],
+                day=step_row["day"],
+                external_info=orjson.loads(step_row["external_info"]) if step_row["external_info"] else None
+            )
+            for step_row in step_rows
+        ]
+        
+        weather_info = orjson.loads(row["weather_info"]) if row["weather_info"] else None
         
         return Plan(
-            id=id,
-            goal=goal,
+            id=row["id"],
+            goal=row["goal"],
             steps=steps,
             weather_info=weather_info,
-            created_at=created_at,
-            total_duration=total_duration,
-            days_count=days_count or 1
+            created_at=row["created_at"],
+            total_duration=row["total_duration"],
+            days_count=row["days_count"] or 1,
+            status=row["status"]
         )
 
+# JSON schema the LLM must follow when generating a plan
+PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "days_count": {"type": "integer"},
+        "steps": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "step_number": {"type": "integer"},
+                    "title": {"type": "string"},
+                    "description": {"type": "string"},
+                    "estimated_time": {"type": "string"},
+                    "day": {"type": "integer"}
+                },
+                "required": ["step_number", "title", "description", "estimated_time", "day"],
+                "additionalProperties": False
+            }
+        },
+        "total_duration": {"type": "string"}
+    },
+    "required": ["days_count", "steps", "total_duration"],
+    "additionalProperties": False
+}
+
+# Cities recognised in goals for weather lookups
+INDIAN_CITIES = frozenset({
+    "mumbai", "delhi", "bangalore", "bengaluru", "hyderabad", "chennai", 
+    "kolkata", "pune", "ahmedabad", "jaipur", "surat", "lucknow",
+    "kanpur", "nagpur", "indore", "thane", "bhopal", "visakhapatnam",
+    "vizag", "pimpri", "patna", "vadodara", "ghaziabad", "ludhiana",
+    "agra", "nashik", "faridabad", "meerut", "rajkot", "kalyan",
+    "vasai", "varanasi", "srinagar", "aurangabad", "dhanbad",
+    "amritsar", "navi mumbai", "allahabad", "prayagraj", "ranchi",
+    "howrah", "coimbatore", "jabalpur", "gwalior", "vijayawada",
+    "jodhpur", "madurai", "raipur", "kota", "guwahati", "chandigarh",
+    "solapur", "hubli", "dharwad", "bareilly", "moradabad", "mysore",
+    "mysuru", "gurgaon", "gurugram", "aligarh", "jalandhar", "tiruchirappalli",
+    "bhubaneswar", "salem", "warangal", "mira", "bhayandar", "thiruvananthapuram",
+    "bhiwandi", "saharanpur", "gorakhpur", "guntur", "bikaner", "amravati",
+    "noida", "jamshedpur", "bhilai", "cuttack", "firozabad", "kochi",
+    "nellore", "bhavnagar", "dehradun", "durgapur", "asansol", "rourkela",
+    "nanded", "kolhapur", "ajmer", "akola", "gulbarga", "jamnagar",
+    "ujjain", "loni", "siliguri", "jhansi", "ulhasnagar", "jammu",
+    "sangli", "miraj", "kupwad", "belgaum", "mangalore", "ambattur",
+    "tirunelveli", "malegaon", "gaya", "jalgaon", "udaipur", "maheshtala",
+    "goa", "panaji", "margao", "kerala", "kottayam", "thrissur",
+    "rajasthan", "mount abu", "pushkar", "rishikesh",
+    "haridwar", "shimla", "manali", "dharamshala", "mcleodganj",
+    "kasauli", "mussoorie", "nainital", "jim corbett", "corbett",
+    "darjeeling", "gangtok", "shillong", "ooty", "kodaikanal",
+    "munnar", "alleppey", "kumarakom", "hampi", "gokarna", "pondicherry",
+    "puducherry", "mahabalipuram", "kanyakumari", "rameswaram",
+    "agartala", "imphal", "aizawl", "kohima", "itanagar"
+})
+# First word of each city -> the most words any city starting with it has,
+# so goal words that cannot begin a city name are skipped with one dict lookup
+CITY_FIRST_WORDS: Dict[str, int] = {}
+for _city in INDIAN_CITIES:
+    _first, *_rest = _city.split()
+    CITY_FIRST_WORDS[_first] = max(CITY_FIRST_WORDS.get(_first, 0), len(_rest) + 1)
+del _city, _first, _rest
+WORD_RE = re.compile(r"[a-z]+")
+# Explicit durations such as "3 days", "2-day", "day 4", "1 week" or "week 2"
+DAYS_RE = re.compile(
+    r"(?P<num>\d+)\s*-?\s*(?P<unit>day|week)|(?P<unit_first>day|week)\s*(?P<num_after>\d+)"
+)
+
 class TaskPlanningAgent:
     """Main AI agent for task planning"""
     
     def __init__(self, config: Config):
         self.config = config
-        self.web_search = WebSearchTool(config.SERPAPI_KEY) if config.SERPAPI_KEY else None
-        self.weather = WeatherTool(config.WEATHER_API_KEY) if config.WEATHER_API_KEY else None
+        self.cache = ResponseCache(config.CACHE_DIR)
+        self.web_search = WebSearchTool(
+            config.SERPAPI_KEY, cache=self.cache, cache_ttl=config.SEARCH_CACHE_TTL
+        ) if config.SERPAPI_KEY else None
+        self.weather = WeatherTool(
+            config.WEATHER_API_KEY, cache=self.cache, cache_ttl=config.WEATHER_CACHE_TTL
+        ) if config.WEATHER_API_KEY else None
+        # The client keeps a pooled HTTP connection to the API across plans
+        self.openai = OpenAI(api_key=config.OPENAI_API_KEY, timeout=60) if config.OPENAI_API_KEY else None
+        self.batch = OpenAIBatchTool(self.openai) if self.openai else None
         self.db = DatabaseManager(config.DATABASE_PATH)
-        
-        # Initialize OpenAI client
-        if config.OPENAI_API_KEY:
-            openai.api_key = config.OPENAI_API_KEY
+        # Runs external API calls concurrently, including ones that finish after
+        # the plan has been returned
+        self.executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="plan-io")
+        # Background plan generation gets its own pool: a job waits on API calls
+        # running in self.executor, so sharing one pool lets a burst of jobs take
+        # every thread and leave those calls queued behind them forever
+        self.jobs = ThreadPoolExecutor(max_workers=16, thread_name_prefix="plan-job")
+        # Plans left "pending" by a worker that died or restarted mid-generation
+        self.db.expire_pending_plans(
+            started_before=(datetime.now() - timedelta(seconds=config.PLAN_TIMEOUT)).isoformat()
+        )
+        # Normalized goal -> (finished_at, plan) for recently completed plans, so a
+        # repeated goal is answered with a copy instead of running the pipeline again
+        self._recent_plans: OrderedDict = OrderedDict()
+        self._recent_plans_lock = threading.Lock()
+        self.recent_plans_size = 128
     
     def create_plan(self, goal: str) -> Plan:
         """Create a comprehensive plan for the given goal"""
         print(f"Creating plan for goal: {goal}")
         
+        recent_plan = self._recent_plan(goal)
+        if recent_plan:
+            return self._save_recent_plan(recent_plan)
+        
+        plan, weather_future = self._prepare_plan(goal)
+        
+        # Step 5: Save to database
+        plan.id = self.db.save_plan(plan)
+        self._store_weather_when_ready(plan, weather_future)
+        
+        return plan
+    
+    def start_plan(self, goal: str) -> Tuple[int, str]:
+        """Save a pending plan for the goal and generate it in the background
+        
+        Returns the new plan's ID and saved status straight away; the status turns
+        "ready" (or "failed") once generation and enrichment are done. A plan
+        reused from a recent identical goal may already be saved as "ready".
+        """
+        print(f"Starting plan for goal: {goal}")
+        
+        recent_plan = self._recent_plan(goal)
+        if recent_plan:
+            plan = self._save_recent_plan(recent_plan)
+            return plan.id, plan.status
+        
+        days_count = self._estimate_days_from_goal(goal)
+        created_at = datetime.now().isoformat()
+        plan_id = self.db.save_plan(Plan(
+            id=None,
+            goal=goal,
+            steps=[],
+            weather_info=None,
+            created_at=created_at,
+            total_duration="Variable",
+            days_count=days_count,
+            status="pending"
+        ))
+        self.jobs.submit(self._finish_plan, plan_id, goal, created_at)
+        
+        return plan_id, "pending"
+    
+    def _finish_plan(self, plan_id: int, goal: str, created_at: str):
+        """Background job: generate the plan for a pending stub saved by start_plan"""
+        try:
+            plan, weather_future = self._prepare_plan(goal)
+            plan.id = plan_id
+            # The plan keeps the stub's creation time, which is also what ends up
+            # in its stored display_json
+            plan.created_at = created_at
+            self.db.update_plan(plan)
+        except Exception as e:
+            print(f"Background plan error for plan {plan_id}: {e}")
+            self.db.update_plan_status(plan_id, "failed")
+            return
+        
+        # Outside the try: a plan that was saved "ready" is never set back to "failed"
+        self._store_weather_when_ready(plan, weather_future)
+    
+    def _prepare_plan(self, goal: str) -> Tuple[Plan, Optional[Future]]:
+        """Generate and enrich an unsaved plan for the goal
+        
+        Also returns the weather lookup if it was still running when the plan
+        was built; the plan is then "pending" until that lookup is stored.
+        """
+        # The goal search and weather lookup only depend on the goal, so start
+        # them alongside the LLM call instead of after it
+        days_count = self._estimate_days_from_goal(goal)
+        search_future = self.executor.submit(
+            self.web_search.search, goal, num_results=15
+        ) if self.web_search else None
+        weather_future = self._submit_weather(goal, days_count)
+        
         # Step 1: Generate initial plan structure
         initial_plan = self._generate_initial_plan(goal)
         
-        # Step 2: Enrich with web search
-        enriched_steps = self._enrich_with_web_search(initial_plan["steps"], goal)
+        plan = self._build_plan(
+            goal, initial_plan,
+            search_results=search_future.result() if search_future else None
+        )
+        
+        # Weather that is not back yet is stored once it arrives; until then the
+        # plan is "pending"
+        if weather_future:
+            if weather_future.done():
+                plan.weather_info = weather_future.result()
+                weather_future = None
+            else:
+                plan.status = "pending"
+        
+        return plan, weather_future
+    
+    def _submit_weather(self, goal: str, days_count: int) -> Optional[Future]:
+        """Start the weather lookup for the goal, if it mentions a known city"""
+        if self.weather and self._detect_city(goal):
+            return self.executor.submit(self._get_weather_info, goal, days_count)
+        return None
+    
+    def _save_recent_plan(self, plan: Plan) -> Plan:
+        """Save a copy made by _recent_plan, looking its weather up afresh
+        
+        Only the steps are reused: the weather goes through the weather cache and
+        its own TTL like any new plan, so the copy is "pending" until it is stored.
+        """
+        weather_future = self._submit_weather(plan.goal, plan.days_count)
+        if weather_future:
+            plan.status = "pending"
+        plan.id = self.db.save_plan(plan)
+        
+        if weather_future:
+            # Not remembered again, so a plan is reused for RECENT_PLAN_TTL after
+            # it was generated rather than after it was last copied
+            weather_future.add_done_callback(
+                lambda future: self._complete_weather(plan, future, remember=False)
+            )
+        return plan
+    
+    def _store_weather_when_ready(self, plan: Plan, weather_future: Optional[Future]):
+        """Write a still-running weather lookup to the saved plan once it finishes"""
+        if weather_future:
+            finished_plan = replace(plan)
+            weather_future.add_done_callback(lambda future: self._complete_weather(finished_plan, future))
+        else:
+            self._remember_plan(plan)
+    
+    @staticmethod
+    def _normalize_goal(goal: str) -> str:
+        return " ".join(goal.lower().split())
+    
+    def _recent_plan(self, goal: str) -> Optional[Plan]:
+        """Return an unsaved copy of a plan recently completed for the same goal, if any"""
+        key = self._normalize_goal(goal)
+        with self._recent_plans_lock:
+            entry = self._recent_plans.get(key)
+            if entry is None:
+                return None
+            finished_at, plan = entry
+            if time.monotonic() - finished_at >= self.config.RECENT_PLAN_TTL:
+                del self._recent_plans[key]
+                return None
+            self._recent_plans.move_to_end(key)
+        
+        # Steps are never modified once a plan is built, so the copy can share them
+        return replace(
+            plan, id=None, goal=goal, weather_info=None, created_at=datetime.now().isoformat(), status="ready"
+        )
+    
+    def _remember_plan(self, plan: Plan):
+        """Keep a completed plan so the same goal can be answered from memory"""
+        if plan.status != "ready":
+            return
+        # Plans built from the fallback structure are not worth repeating; the
+        # LLM structure is only cached when the LLM call succeeded
+        days_count = self._estimate_days_from_goal(plan.goal)
+        if self._plan_cache_key(plan.goal, days_count) not in self.cache:
+            return
+        
+        key = self._normalize_goal(plan.goal)
+        with self._recent_plans_lock:
+            self._recent_plans[key] = (time.monotonic(), replace(plan))
+            self._recent_plans.move_to_end(key)
+            while len(self._recent_plans) > self.recent_plans_size:
+                self._recent_plans.popitem(last=False)
+    
+    def create_plans_batch(self, goals: List[str], poll_interval: float = 30) -> List[Plan]:
+        """Create plans for many goals at once through the OpenAI Batch API
+        
+        Meant for offline/bulk workloads: the batch runs at a lower price but
+        may take up to 24 hours to complete, and this call blocks until it does.
+        """
+        print(f"Creating {len(goals)} plans in batch")
+        
+        days_counts = [self._estimate_days_from_goal(goal) for goal in goals]
+        initial_plans: List[Optional[Dict]] = [
+            self.cache.get(self._plan_cache_key(goal, days_count))
+            for goal, days_count in zip(goals, days_counts)
+        ]
+        
+        # Step 1: Generate initial plan structures for the cache misses in one batch job
+        pending = [i for i, initial_plan in enumerate(initial_plans) if initial_plan is None]
+        if pending and self.batch:
+            try:
+                batch_id = self.batch.submit([
+                    {
+                        "custom_id": f"goal-{i}",
+                        "body": self._plan_request_body(goals[i], days_counts[i])
+                    }
+                    for i in pending
+                ])
+                contents = self.batch.get_results(self.batch.wait(batch_id, poll_interval))
+                
+                for i in pending:
+                    try:
+                        initial_plan = orjson.loads(contents[f"goal-{i}"])
+                    except (KeyError, ValueError) as e:
+                        print(f"Batch result error for goal {i}: {e}")
+                        continue
+                    self.cache.set(self._plan_cache_key(goals[i], days_counts[i]), initial_plan)
+                    initial_plans[i] = initial_plan
+            except Exception as e:
+                print(f"Batch LLM error: {e}")
         
-        # Step 3: Get weather information if location-based
-        weather_info = self._get_weather_info(goal, initial_plan.get("days_count", 1))
+        # Look up the weather for every goal in the background while searching
+        # for all of them at once, rather than one plan at a time
+        weather_futures = [
+            self.executor.submit(self._get_weather_info, goal, days_count) if self.weather else None
+            for goal, days_count in zip(goals, days_counts)
+        ]
+        all_search_results = self.web_search.search_many(
+            goals, num_results=15
+        ) if self.web_search else [None] * len(goals)
+        
+        plans = []
+        for goal, days_count, initial_plan, search_results, weather_future in zip(
+            goals, days_counts, initial_plans, all_search_results, weather_futures
+        ):
+            if initial_plan is None:
+                initial_plan = self._generate_fallback_plan(goal, days_count)
+            plan = self._build_plan(goal, initial_plan, search_results=search_results)
+            if weather_future:
+                plan.weather_info = weather_future.result()
+            plans.append(plan)
         
-        # Step 4: Create final plan object
+        # Step 5: Save all plans to database in one transaction
+        for plan, plan_id in zip(plans, self.db.save_plans_many(plans)):
+            plan.id = plan_id
+        
+        return plans
+    
+    def _build_plan(self, goal: str, initial_plan: Dict,
+                    search_results: Optional[List[Dict]]) -> Plan:
+        """Enrich an initial plan structure into an unsaved Plan
+        
+        search_results are those of the goal's web search, made by the caller
+        (None when web search is not configured).
+        The plan has no weather; callers look it up alongside and store it.
+        """
+        days_count = initial_plan.get("days_count", 1)
+        
+        # Step 2: Enrich with web search
+        enriched_steps = self._enrich_with_web_search(initial_plan["steps"], search_results)
+        
+        # Step 3: Create final plan object
         plan = Plan(
             id=None,
             goal=goal,
             steps=enriched_steps,
-            weather_info=weather_info,
+            weather_info=None,
             created_at=datetime.now().isoformat(),
             total_duration=initial_plan.get("total_duration", "Variable"),
-            days_count=initial_plan.get("days_count", 1)
+            days_count=days_count
         )
         
-        # Step 5: Save to database
-        plan.id = self.db.save_plan(plan)
-        
         return plan
     
+    def _complete_weather(self, plan: Plan, weather_future: Future, remember: bool = True):
+        """Store a weather lookup that finished after its plan was saved and mark the plan ready"""
+        weather_info = None
+        try:
+            weather_info = weather_future.result()
+        except Exception as e:
+            print(f"Background weather error for plan {plan.id}: {e}")
+        finally:
+            self.db.update_plan_weather(plan.id, weather_info)
+        
+        if remember and weather_info is not None:
+            self._remember_plan(replace(plan, weather_info=weather_info, status="ready"))
+    
     def _estimate_days_from_goal(self, goal: str) -> int:
         """Estimate number of days based on goal keywords"""
         goal_lower = goal.lower()
         
         # Look for explicit day mentions
-        day_patterns = [
-            r'(\d+)\s*day', r'(\d+)-day', r'day\s*(\d+)',
-            r'(\d+)\s*week', r'week\s*(\d+)'
-        ]
-        
-        for pattern in day_patterns:
-            match = re.search(pattern, goal_lower)
-            if match:
-                days = int(match.group(1))
-                if 'week' in pattern:
-                    days *= 7
-                return min(days, 7)  # Cap at 7 days
+        match = DAYS_RE.search(goal_lower)
+        if match:
+            days = int(match.group("num") or match.group("num_after"))
+            if (match.group("unit") or match.group("unit_first")) == "week":
+                days *= 7
+            return min(days, 7)  # Cap at 7 days
         
         # Estimate based on activity type
         if any(word in goal_lower for word in ['tour', 'trip', 'visit', 'explore', 'vacation', 'holiday']):
@@ -310,49 +1150,20 @@ class TaskPlanningAgent:
         """Generate initial plan structure using LLM"""
         days_count = self._estimate_days_from_goal(goal)
         
-        prompt = f"""
-        Create a detailed step-by-step plan for the following goal: "{goal}"
-        
-        The plan should be organized across {days_count} day(s). Each step should be practical and actionable.
-        
-        Please provide:
-        1. A list of specific, actionable steps distributed across days
-        2. Estimated time for each step
-        3. Brief description of what each step involves
-        4. Which day each step belongs to
-        5. Total estimated duration
-        
-        Format your response as JSON with this structure:
-        {{
-            "days_count": {days_count},
-            "steps": [
-                {{
-                    "step_number": 1,
-                    "title": "Step title",
-                    "description": "Detailed description with specific recommendations",
-                    "estimated_time": "2 hours",
-                    "day": 1
-                }}
-            ],
-            "total_duration": "{days_count} days"
-        }}
-        
-        Make sure steps are distributed evenly across the {days_count} day(s) and include specific places, activities, or recommendations where relevant.
-        """
+        cache_key = self._plan_cache_key(goal, days_count)
+        cached_plan = self.cache.get(cache_key)
+        if cached_plan is not None:
+            return cached_plan
         
         try:
-            if self.config.OPENAI_API_KEY:
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful planning assistant who creates detailed, day-by-day itineraries. Always respond with valid JSON and include specific recommendations."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7
-                )
+            if self.openai:
+                response = self.openai.chat.completions.create(**self._plan_request_body(goal, days_count))
                 
                 content = response.choices[0].message.content
-                return json.loads(content)
+                initial_plan = orjson.loads(content)
+                # Only successful LLM responses are cached, never the fallback
+                self.cache.set(cache_key, initial_plan)
+                return initial_plan
             else:
                 # Fallback without OpenAI API
                 return self._generate_fallback_plan(goal, days_count)
@@ -361,6 +1172,33 @@ class TaskPlanningAgent:
             print(f"LLM error: {e}")
             return self._generate_fallback_plan(goal, days_count)
     
+    def _plan_cache_key(self, goal: str, days_count: int) -> str:
+        """Cache key for the LLM-generated plan structure of a goal"""
+        return ResponseCache.make_key("plan", self.config.OPENAI_MODEL, goal, days_count)
+    
+    def _plan_request_body(self, goal: str, days_count: int) -> Dict:
+        """Build the chat completion request used to generate a plan"""
+        prompt = (
+            f'Create a step-by-step plan for this goal: "{goal}"\n\n'
+            f"Spread practical, actionable steps evenly across {days_count} day(s). For each step give a "
+            "title, a description with specific places, activities or recommendations where relevant, "
+            f"an estimated time and its day. Set days_count to {days_count} and give the total duration."
+        )
+        
+        return {
+            "model": self.config.OPENAI_MODEL,
+            "messages": [
+                {"role": "system", "content": "You are a helpful planning assistant who creates detailed, day-by-day itineraries with specific recommendations."},
+                {"role": "user", "content": prompt}
+            ],
+            # Structured outputs: the model can only produce JSON matching PLAN_SCHEMA
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": "plan", "schema": PLAN_SCHEMA, "strict": True}
+            },
+            "temperature": 0.7
+        }
+    
     def _generate_fallback_plan(self, goal: str, days_count: int) -> Dict:
         """Generate a fallback plan when LLM is not available"""
         steps = []
@@ -401,43 +1239,37 @@ class TaskPlanningAgent:
             "total_duration": f"{days_count} days"
         }
     
-    def _enrich_with_web_search(self, steps_data: List[Dict], goal: str) -> List[PlanStep]:
-        """Enrich plan steps with web search information"""
-        enriched_steps = []
-        
-        if not self.web_search:
-            # Return steps without web search enrichment
-            for step_data in steps_data:
-                step = PlanStep(
-                    step_number=step_data["step_number"],
-                    title=step_data["title"],
-                    description=step_data["description"],
-                    estimated_time=step_data["estimated_time"],
-                    day=step_data.get("day", 1)
-                )
-                enriched_steps.append(step)
-            return enriched_steps
-        
-        # General search for the goal
-        search_results = self.web_search.search(goal)
-        
-        for step_data in steps_data:
-            step = PlanStep(
+    def _enrich_with_web_search(self, steps_data: List[Dict],
+                                search_results: Optional[List[Dict]]) -> List[PlanStep]:
+        """Enrich plan steps with the results of the goal's web search (None without web search)"""
+        # Ordered by day once here, so displaying the plan never has to regroup it
+        steps = sorted((
+            PlanStep(
                 step_number=step_data["step_number"],
                 title=step_data["title"],
                 description=step_data["description"],
                 estimated_time=step_data["estimated_time"],
                 day=step_data.get("day", 1)
             )
-            
-            # Search for specific information related to this step
-            step_query = f"{goal} {step.title}"
-            step_results = self.web_search.search(step_query, num_results=3)
+            for step_data in steps_data
+        ), key=attrgetter("day", "step_number"))
+        
+        if search_results is None:
+            # Return steps without web search enrichment
+            return steps
+        
+        # One search for the whole goal; its results are shared out between the
+        # steps by how closely they match each step's title
+        search_texts = [f"{result['title']} {result['snippet']}".lower() for result in search_results]
+        
+        for step in steps:
+            matches = process.extract(step.title.lower(), search_texts, scorer=fuzz.partial_ratio, limit=2)
+            step_results = [search_results[index] for _, _, index in matches]
             
             if step_results:
                 # Extract useful information from search results
                 relevant_info = []
-                for result in step_results[:2]:
+                for result in step_results:
                     snippet = result.get("snippet", "")
                     if snippet:
                         # Clean and format the snippet
@@ -447,57 +1279,18 @@ class TaskPlanningAgent:
                         relevant_info.append(clean_snippet)
                 
                 step.external_info = {
-                    "search_results": step_results[:2],
+                    "search_results": step_results,
                     "relevant_info": relevant_info
                 }
-            
-            enriched_steps.append(step)
         
-        return enriched_steps
+        return steps
     
     def _get_weather_info(self, goal: str, days_count: int) -> Optional[Dict]:
         """Extract location from goal and get weather information"""
         if not self.weather:
             return None
             
-        # Enhanced location extraction
-        indian_cities = [
-            "mumbai", "delhi", "bangalore", "bengaluru", "hyderabad", "chennai", 
-            "kolkata", "pune", "ahmedabad", "jaipur", "surat", "lucknow",
-            "kanpur", "nagpur", "indore", "thane", "bhopal", "visakhapatnam",
-            "vizag", "pimpri", "patna", "vadodara", "ghaziabad", "ludhiana",
-            "agra", "nashik", "faridabad", "meerut", "rajkot", "kalyan",
-            "vasai", "varanasi", "srinagar", "aurangabad", "dhanbad",
-            "amritsar", "navi mumbai", "allahabad", "prayagraj", "ranchi",
-            "howrah", "coimbatore", "jabalpur", "gwalior", "vijayawada",
-            "jodhpur", "madurai", "raipur", "kota", "guwahati", "chandigarh",
-            "solapur", "hubli", "dharwad", "bareilly", "moradabad", "mysore",
-            "mysuru", "gurgaon", "gurugram", "aligarh", "jalandhar", "tiruchirappalli",
-            "bhubaneswar", "salem", "warangal", "mira", "bhayandar", "thiruvananthapuram",
-            "bhiwandi", "saharanpur", "gorakhpur", "guntur", "bikaner", "amravati",
-            "noida", "jamshedpur", "bhilai", "cuttack", "firozabad", "kochi",
-            "nellore", "bhavnagar", "dehradun", "durgapur", "asansol", "rourkela",
-            "nanded", "kolhapur", "ajmer", "akola", "gulbarga", "jamnagar",
-            "ujjain", "loni", "siliguri", "jhansi", "ulhasnagar", "jammu",
-            "sangli", "miraj", "kupwad", "belgaum", "mangalore", "ambattur",
-            "tirunelveli", "malegaon", "gaya", "jalgaon", "udaipur", "maheshtala",
-            "goa", "panaji", "margao", "kerala", "kottayam", "thrissur",
-            "rajasthan", "udaipur", "mount abu", "pushkar", "rishikesh",
-            "haridwar", "shimla", "manali", "dharamshala", "mcleodganj",
-            "kasauli", "mussoorie", "nainital", "jim corbett", "corbett",
-            "darjeeling", "gangtok", "shillong", "ooty", "kodaikanal",
-            "munnar", "alleppey", "kumarakom", "hampi", "gokarna", "pondicherry",
-            "puducherry", "mahabalipuram", "kanyakumari", "rameswaram",
-            "agartala", "imphal", "aizawl", "kohima", "itanagar"
-        ]
-        
-        goal_lower = goal.lower()
-        detected_city = None
-        
-        for city in indian_cities:
-            if city in goal_lower:
-                detected_city = city
-                break
+        detected_city = self._detect_city(goal)
         
         if detected_city:
             weather_data = self.weather.get_weather(detected_city, days=days_count)
@@ -506,51 +1299,119 @@ class TaskPlanningAgent:
         
         return None
     
-    def get_plan_history(self) -> List[Plan]:
-        """Get all saved plans"""
-        return self.db.get_all_plans()
+    def _detect_city(self, goal: str) -> Optional[str]:
+        """Find the first known city mentioned in the goal"""
+        # Enhanced location extraction: one pass over the goal's words with a set
+        # lookup each, trying longer names first so "navi mumbai" beats "mumbai"
+        words = WORD_RE.findall(goal.lower())
+        for i, word in enumerate(words):
+            max_words = CITY_FIRST_WORDS.get(word)
+            if max_words is None:
+                continue
+            for length in range(max_words, 0, -1):
+                candidate = " ".join(words[i:i + length])
+                if candidate in INDIAN_CITIES:
+                    return candidate
+        return None
+    
+    def iter_plan_history_raw(self) -> Iterator[tuple]:
+        """Iterate over all saved plans as raw database rows"""
+        return self.db.iter_plans_raw()
+    
+    def get_plan_summaries(self, limit: int = 20, offset: int = 0) -> List[PlanSummary]:
+        """Get a page of saved plan summaries"""
+        return self.db.get_plan_summaries(limit, offset)
     
     def get_plan_by_id(self, plan_id: int) -> Optional[Plan]:
         """Get a specific plan by ID"""
         return self.db.get_plan(plan_id)
     
+    def get_plan_json_by_id(self, plan_id: int) -> Optional[bytes]:
+        """Get a specific plan's API JSON by ID"""
+        return self.db.get_plan_json(plan_id)
+    
     def format_plan_display(self, plan: Plan) -> str:
         """Format plan for display with day-by-day structure"""
-        output = []
-        
-        # Group steps by day
-        steps_by_day = {}
-        for step in plan.steps:
-            day = step.day
-            if day not in steps_by_day:
-                steps_by_day[day] = []
-            steps_by_day[day].append(step)
-        
-        # Format each day
-        for day in sorted(steps_by_day.keys()):
-            output.append(f"Day {day}:")
-            
-            for step in steps_by_day[day]:
-                output.append(f"{step.step_number}. {step.title} ({step.estimated_time})")
-                output.append(f"   - {step.description}")
-                
-                if step.external_info and step.external_info.get('relevant_info'):
-                    for info in step.external_info['relevant_info']:
-                        output.append(f"   - External Info: {info}")
-                
-                output.append("")  # Add blank line
+        return format_plan_display(plan)
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for faster API responses"""
+    
+    OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=self.OPTIONS).decode()
+    
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        """Encode straight to bytes, skipping the intermediate str"""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.OPTIONS),
+            mimetype="application/json"
+        )
+
+def format_plan_display(plan: Plan) -> str:
+    """Format plan for display with day-by-day structure"""
+    output = []
+    
+    # Steps are stored in day order; the stable sort is a single linear pass
+    # for them and only reorders plans saved before steps were sorted
+    for day, day_steps in groupby(sorted(plan.steps, key=attrgetter("day")), key=attrgetter("day")):
+        output.append(f"Day {day}:")
         
-        return "\n".join(output)
+        for step in day_steps:
+            output.append(f"{step.step_number}. {step.title} ({step.estimated_time})")
+            output.append(f"   - {step.description}")
+            
+            if step.external_info and step.external_info.get('relevant_info'):
+                for info in step.external_info['relevant_info']:
+                    output.append(f"   - External Info: {info}")
+            
+            output.append("")  # Add blank line
+    
+    return "\n".join(output)
+
+def plan_to_api_json(plan: Plan) -> bytes:
+    """Encode a plan as returned by /api/plan/<id>, including its formatted display"""
+    # orjson encodes the Plan and PlanStep dataclasses natively, so instead of
+    # deep-copying the plan through asdict() just to add one key, the key is
+    # spliced in before the object's closing brace
+    plan_json = orjson.dumps(plan, option=OrjsonProvider.OPTIONS)
+    return plan_json[:-1] + b',"formatted_display":' + orjson.dumps(format_plan_display(plan)) + b"}"
+
+def plan_row_to_json(row: tuple) -> bytes:
+    """Encode a raw plan row as a JSON object, splicing in the stored JSON columns verbatim"""
+    id, goal, steps_json, weather_info_json, created_at, total_duration, days_count, status = row
+    return b'{"id":%d,"goal":%s,"steps":%s,"weather_info":%s,"created_at":%s,"total_duration":%s,"days_count":%d,"status":%s}' % (
+        id,
+        orjson.dumps(goal),
+        steps_json.encode(),
+        weather_info_json.encode() if weather_info_json else b"null",
+        orjson.dumps(created_at),
+        orjson.dumps(total_duration),
+        days_count,
+        orjson.dumps(status)
+    )
 
 # Flask Web Application
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 agent = TaskPlanningAgent(Config())
 
 @app.route('/')
 def index():
     """Main page with form and plan history"""
-    plans = agent.get_plan_history()
-    return render_template('index.html', plans=plans)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = Config.PLANS_PER_PAGE
+    
+    # Fetch one extra row to know whether there is a next page
+    plans = agent.get_plan_summaries(limit=per_page + 1, offset=(page - 1) * per_page)
+    has_next = len(plans) > per_page
+    
+    return render_template('index.html', plans=plans[:per_page], page=page, has_next=has_next)
 
 @app.route('/create_plan', methods=['POST'])
 def create_plan():
@@ -560,13 +1421,22 @@ def create_plan():
         return jsonify({"error": "Goal is required"}), 400
     
     try:
-        plan = agent.create_plan(goal)
+        # Generation runs in the background; the client polls /api/plan/<id>
+        # until the status is no longer "pending"
+        plan_id, status = agent.start_plan(goal)
+        if status == "pending":
+            return jsonify({
+                "success": True,
+                "plan_id": plan_id,
+                "status": status,
+                "message": "Plan creation started!"
+            }), 202
         return jsonify({
             "success": True,
-            "plan_id": plan.id,
-            "message": "Plan created successfully!",
-            "formatted_plan": agent.format_plan_display(plan)
-        })
+            "plan_id": plan_id,
+            "status": status,
+            "message": "Plan created!"
+        }), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -583,23 +1453,31 @@ def view_plan(plan_id):
 @app.route('/api/plans')
 def api_plans():
     """API endpoint to get all plans"""
-    plans = agent.get_plan_history()
-    return jsonify([asdict(plan) for plan in plans])
+    # Stored steps/weather JSON is passed through as-is instead of being
+    # decoded into dataclasses and encoded again, and the array is streamed
+    # one plan at a time so memory stays flat however many plans there are
+    def generate():
+        yield b"["
+        for index, row in enumerate(agent.iter_plan_history_raw()):
+            yield (b"," if index else b"") + plan_row_to_json(row)
+        yield b"]"
+    
+    return app.response_class(generate(), mimetype="application/json")
 
 @app.route('/api/plan/<int:plan_id>')
 def api_plan_detail(plan_id):
     """API endpoint to get a specific plan"""
-    plan = agent.get_plan_by_id(plan_id)
-    if not plan:
+    # The response body is encoded when the plan is written, so serving it is
+    # a single column read
+    plan_json = agent.get_plan_json_by_id(plan_id)
+    if plan_json is None:
         return jsonify({"error": "Plan not found"}), 404
     
-    return jsonify({
-        **asdict(plan),
-        "formatted_display": agent.format_plan_display(plan)
-    })
+    return app.response_class(plan_json, mimetype="application/json")
 
 if __name__ == '__main__':
     print("Starting AI Task Planning Agent...")
     print("\n Server starting at http://localhost:5000")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only; use gunicorn.conf.py in production
+    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,20 @@
+# Gunicorn configuration for the AI Task Planning Agent
+# Usage: gunicorn -c gunicorn.conf.py app:app
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+
+# Plan creation is dominated by network I/O (OpenAI, SerpAPI, OpenWeatherMap),
+# so each worker runs gevent greenlets that keep serving while calls are in flight
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gevent"
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", "1000"))
+
+# The gevent worker monkey-patches the standard library (sockets, threads) before
+# loading the app, so app.py must not be imported early in the master process
+preload_app = False
+
+# LLM + enrichment can take several seconds per plan
+timeout = 120